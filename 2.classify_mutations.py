@@ -170,13 +170,13 @@ for gene_idx, gene_series in genes_df.iterrows():
                     )
                     # Get metric predictions
                     y_train_results = get_threshold_metrics(
-                        y_train_df.status, y_pred_train_df, drop=False
+                        y_train_df.status, y_pred_train_df
                     )
                     y_test_results = get_threshold_metrics(
-                        y_test_df.status, y_pred_test_df, drop=False
+                        y_test_df.status, y_pred_test_df
                     )
                     y_cv_results = get_threshold_metrics(
-                        y_train_df.status, y_cv_df, drop=False
+                        y_train_df.status, y_cv_df
                     )
 
                     # Get coefficients
@@ -5,22 +5,85 @@ https://github.com/greenelab/BioBombe/blob/master/9.tcga-classify/scripts/tcga_u
 """
 
 import os
+import re
 import glob
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    roc_auc_score,
-    roc_curve,
-    precision_recall_curve,
-    average_precision_score,
-)
+from sklearn.metrics import roc_curve, precision_recall_curve
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import cross_val_predict
+from sklearn.model_selection import GridSearchCV, cross_val_predict
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import SGDClassifier
-from dask_ml.model_selection import GridSearchCV
+from joblib import parallel_backend
 
 import config as cfg
 
+# z matrix filenames, as written by 1.compress_given_z.py:
+# {alg}_{seed}[_shuffled]_z_[test_]matrix.tsv.gz
+_Z_FILE_RE = re.compile(
+    r"^(?P<alg>[^_]+)_(?P<seed>[^_]+)_(?P<shuffled>shuffled_)?"
+    r"z_(?P<test>test_)?matrix"
+)
+
+# process umask, used to set permissions on cached z matrices (read once here,
+# since os.umask can only be queried by setting it, which isn't thread-safe)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _read_z(z_file):
+    """
+    Load a compressed z matrix, caching the parsed DataFrame in a pickle
+    alongside the original file
+
+    Parsing the gzipped TSVs is the bulk of the time spent loading z matrices,
+    and the same matrices are read many times across the ensemble analyses,
+    so we only parse each file once and load the pickle afterward.
+
+    Arguments:
+    z_file - path to a tab-separated z matrix file
+
+    Output: pandas DataFrame of the z matrix (samples x latent features)
+    """
+    z_file = str(z_file)
+    cache_file = z_file + '.pkl'
+
+    # only use the pickle if it's at least as new as the z matrix, so reruns
+    # of the compression scripts invalidate the cache
+    if (os.path.exists(cache_file) and
+            os.path.getmtime(cache_file) >= os.path.getmtime(z_file)):
+        try:
+            return pd.read_pickle(cache_file)
+        except Exception:
+            # the cache is best-effort (e.g. unreadable, or written by a
+            # different pandas version), so fall back to the z matrix
+            pass
+
+    z_df = pd.read_csv(z_file, index_col=0, sep='\t')
+
+    # write to a temporary file and move it into place, so concurrent
+    # readers never see a partially written pickle; if the cache can't be
+    # written (e.g. read-only models directory), just skip it
+    try:
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file) or '.',
+                                        suffix='.tmp')
+    except OSError:
+        return z_df
+    os.close(fd)
+    try:
+        z_df.to_pickle(tmp_file)
+        # mkstemp creates files readable only by the owner, so give the
+        # cache the usual permissions for a new file
+        os.chmod(tmp_file, 0o666 & ~_UMASK)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return z_df
+
 
 def build_feature_dictionary(models_dir, load_data=False, store_train_test="both"):
     """
@@ -38,86 +101,152 @@ def build_feature_dictionary(models_dir, load_data=False, store_train_test="both
             training and testing sets
     """
 
-    z_matrix_dict = {}
+    z_matrix_dict = {"signal": {}, "shuffled": {}}
+    z_files = []
     num_models = 0
-    for signal in ["signal", "shuffled"]:
-        z_matrix_dict[signal] = {}
 
-        matrix_dir = os.path.join(
-            models_dir, "ensemble_z_matrices"
-        )
+    matrix_dir = os.path.join(
+        models_dir, "ensemble_z_matrices"
+    )
 
-        for comp_dir in os.listdir(matrix_dir):
-            matrix_comp_dir = os.path.join(matrix_dir, comp_dir)
-            z_dim = comp_dir.split("_")[-1]
+    # only glob the files we need (matching the original .tsv.gz files, not
+    # their cached pickles)
+    if store_train_test == "train":
+        pattern = "{}/*_z_matrix.tsv.gz"
+    elif store_train_test == "test":
+        pattern = "{}/*_z_test_matrix.tsv.gz"
+    else:
+        pattern = "{}/*_z_*.tsv.gz"
+
+    for comp_dir in os.listdir(matrix_dir):
+        matrix_comp_dir = os.path.join(matrix_dir, comp_dir)
+        z_dim = comp_dir.split("_")[-1]
+        for signal in ["signal", "shuffled"]:
             z_matrix_dict[signal][z_dim] = {}
 
-            pattern = ("{}/*shuffled_z_*" if signal == 'shuffled'
-                                          else "{}/*_z_*")
-
-            for z_file in glob.glob(pattern.format(matrix_comp_dir)):
-
-                if signal == 'signal' and 'shuffled' in z_file:
-                    continue
-
-                seed = os.path.basename(z_file).split("_")[1]
-                alg = os.path.basename(z_file).split("_")[0]
-
-                if seed not in z_matrix_dict[signal][z_dim].keys():
-                    z_matrix_dict[signal][z_dim][seed] = {}
-
-                if alg not in z_matrix_dict[signal][z_dim][seed].keys():
-                    z_matrix_dict[signal][z_dim][seed][alg] = {}
-
-                if "_test_" in z_file:
-                    if store_train_test == "train":
-                        continue
-                    if load_data:
-                        z_matrix_dict[signal][z_dim][seed][alg]["test"] = pd.read_csv(
-                            z_file, index_col=0, sep='\t'
-                        )
-                    else:
-                        z_matrix_dict[signal][z_dim][seed][alg]["test"] = z_file
-                else:
-                    num_models += 1
-                    if store_train_test == "test":
-                        continue
-                    if load_data:
-                        z_matrix_dict[signal][z_dim][seed][alg]["train"] = pd.read_csv(
-                            z_file, index_col=0, sep='\t'
-                        )
-                    else:
-                        z_matrix_dict[signal][z_dim][seed][alg]["train"] = z_file
+        for z_file in glob.glob(pattern.format(matrix_comp_dir)):
+
+            z_match = _Z_FILE_RE.match(os.path.basename(z_file))
+            if z_match is None:
+                continue
+
+            signal = "shuffled" if z_match.group("shuffled") else "signal"
+            seed = z_match.group("seed")
+            alg = z_match.group("alg")
+
+            seed_dict = z_matrix_dict[signal][z_dim].setdefault(seed, {})
+            alg_dict = seed_dict.setdefault(alg, {})
+
+            data_type = "test" if z_match.group("test") else "train"
+
+            # each model writes one training and one testing matrix, so count
+            # models from whichever files were globbed
+            if data_type == "train" or store_train_test == "test":
+                num_models += 1
+
+            alg_dict[data_type] = z_file
+            z_files.append((signal, z_dim, seed, alg, data_type, z_file))
+
+    if load_data:
+        # pandas releases the GIL while parsing, so reading the files in
+        # threads overlaps IO and parsing across files
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            z_dfs = executor.map(_read_z, [f[-1] for f in z_files])
+            for (signal, z_dim, seed, alg, data_type, _), z_df in zip(z_files, z_dfs):
+                z_matrix_dict[signal][z_dim][seed][alg][data_type] = z_df
 
     return z_matrix_dict, num_models
 
 
-def get_threshold_metrics(y_true, y_pred, drop=False):
+def _auroc_aupr(y_true, y_score):
+    """
+    Compute AUROC and AUPR from a single sort of the predictions
+
+    Equivalent to sklearn's `roc_auc_score` and `average_precision_score` for
+    binary labels, but sorts the predictions once and sweeps the thresholds
+    for both metrics, instead of each sklearn function sorting separately.
+
+    Arguments:
+    y_true - an array of gold standard binary status
+    y_score - an array of predicted scores
+
+    Output:
+    tuple of (auroc, aupr)
+    """
+    y_true = np.asarray(y_true).ravel()
+    y_score = np.asarray(y_score).ravel()
+
+    # sort ascending and reverse (as sklearn does), rather than negating the
+    # scores, which fails for bool scores and wraps around for unsigned ints
+    desc_ixs = np.argsort(y_score, kind="mergesort")[::-1]
+    y_score = y_score[desc_ixs]
+    y_true = y_true[desc_ixs]
+
+    # accumulate true/false positives at each distinct threshold, so tied
+    # scores are treated as a single operating point
+    distinct_ixs = np.where(np.diff(y_score))[0]
+    threshold_ixs = np.r_[distinct_ixs, y_true.size - 1]
+    tps = np.cumsum(y_true)[threshold_ixs]
+    fps = 1 + threshold_ixs - tps
+
+    if tps[-1] == 0 or fps[-1] == 0:
+        raise ValueError(
+            "Only one class present in y_true. AUROC/AUPR are not defined in "
+            "that case."
+        )
+
+    # trapezoidal area under the ROC curve
+    fpr = np.r_[0, fps] / fps[-1]
+    tpr = np.r_[0, tps] / tps[-1]
+    auroc = np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)
+
+    # step-wise area under the PR curve (average precision)
+    precision = tps / (tps + fps)
+    recall = tps / tps[-1]
+    aupr = np.sum(np.diff(np.r_[0, recall]) * precision)
+
+    return auroc, aupr
+
+
+def get_threshold_metrics(
+    y_true, y_pred, drop=True, metrics_only=False, max_pr_points=500
+):
     """
     Retrieve true/false positive rates and auroc/aupr for class predictions
 
     Arguments:
     y_true - an array of gold standard mutation status
     y_pred - an array of predicted mutation status
-    drop - boolean if intermediate thresholds are dropped
+    drop - boolean if intermediate thresholds are dropped (if True, also
+           subsample the PR curve to at most max_pr_points thresholds)
+    metrics_only - boolean if only AUROC/AUPR are computed (no ROC/PR curves)
+    max_pr_points - maximum number of PR curve points to keep if drop is True
 
     Output:
     dict of AUROC, AUPR, pandas dataframes of ROC and PR data, and cancer-type
     """
-    roc_columns = ["fpr", "tpr", "threshold"]
-    pr_columns = ["precision", "recall", "threshold"]
+    auroc, aupr = _auroc_aupr(y_true, y_pred)
 
-    roc_results = roc_curve(y_true, y_pred, drop_intermediate=drop)
-    roc_items = zip(roc_columns, roc_results)
-    roc_df = pd.DataFrame.from_dict(dict(roc_items))
+    if metrics_only:
+        return {"auroc": auroc, "aupr": aupr}
 
+    fpr, tpr, roc_thresh = roc_curve(y_true, y_pred, drop_intermediate=drop)
+    roc_df = pd.DataFrame({"fpr": fpr, "tpr": tpr, "threshold": roc_thresh})
+
+    # sklearn returns one fewer threshold than precision/recall values, so
+    # pad the last row with NaN
     prec, rec, thresh = precision_recall_curve(y_true, y_pred)
-    pr_df = pd.DataFrame.from_records([prec, rec]).T
-    pr_df = pd.concat([pr_df, pd.Series(thresh)], ignore_index=True, axis=1)
-    pr_df.columns = pr_columns
+    thresh = np.concatenate([thresh, [np.nan]])
+
+    # precision_recall_curve has no drop_intermediate option, so keep evenly
+    # spaced thresholds (always including both ends of the curve) instead
+    if drop and prec.shape[0] > max_pr_points:
+        keep_ixs = np.unique(
+            np.linspace(0, prec.shape[0] - 1, max_pr_points).round().astype(int)
+        )
+        prec, rec, thresh = prec[keep_ixs], rec[keep_ixs], thresh[keep_ixs]
 
-    auroc = roc_auc_score(y_true, y_pred, average="weighted")
-    aupr = average_precision_score(y_true, y_pred, average="weighted")
+    pr_df = pd.DataFrame({"precision": prec, "recall": rec, "threshold": thresh})
 
     return {"auroc": auroc, "aupr": aupr, "roc_df": roc_df, "pr_df": pr_df}
 
@@ -128,6 +257,9 @@ def summarize_results(
     """
     Given an input results file, summarize and output all pertinent files
 
+    Note that the ROC/PR frames in `results` are modified in place (metadata
+    columns are added to them), and the same frames are returned.
+
     Arguments:
     results - a results object output from `get_threshold_metrics`
     gene_or_cancertype - the gene or cancertype of interest
@@ -138,37 +270,24 @@ def summarize_results(
     data_type - the type of data (either training, testing, or cv)
     """
 
-    results_append_list = [
-        gene_or_cancertype,
-        signal,
-        z_dim,
-        seed,
-        algorithm,
-        data_type,
-    ]
+    results_meta = {
+        "predictor": gene_or_cancertype,
+        "signal": signal,
+        "z_dim": z_dim,
+        "seed": seed,
+        "algorithm": algorithm,
+        "data_type": data_type,
+    }
 
-    metrics_out_ = [results["auroc"], results["aupr"]] + results_append_list
+    metrics_out_ = [results["auroc"], results["aupr"]] + list(results_meta.values())
 
+    # add metadata columns to the curve DataFrames in place, rather than
+    # copying each one with assign()
     roc_df_ = results["roc_df"]
     pr_df_ = results["pr_df"]
-
-    roc_df_ = roc_df_.assign(
-        predictor=gene_or_cancertype,
-        signal=signal,
-        z_dim=z_dim,
-        seed=seed,
-        algorithm=algorithm,
-        data_type=data_type,
-    )
-
-    pr_df_ = pr_df_.assign(
-        predictor=gene_or_cancertype,
-        signal=signal,
-        z_dim=z_dim,
-        seed=seed,
-        algorithm=algorithm,
-        data_type=data_type,
-    )
+    for col, value in results_meta.items():
+        roc_df_[col] = value
+        pr_df_[col] = value
 
     return metrics_out_, roc_df_, pr_df_
 
@@ -190,15 +309,21 @@ def extract_coefficients(cv_pipeline, feature_names, signal, z_dim, seed, algori
     final_pipeline = cv_pipeline.best_estimator_
     final_classifier = final_pipeline.named_steps["classify"]
 
-    coef_df = pd.DataFrame.from_dict(
-        {"feature": feature_names, "weight": final_classifier.coef_[0]}
-    )
-
-    coef_df = (
-        coef_df.assign(abs=coef_df["weight"].abs())
-        .sort_values("abs", ascending=False)
-        .reset_index(drop=True)
-        .assign(signal=signal, z_dim=z_dim, seed=seed, algorithm=algorithm)
+    # sort coefficients by decreasing magnitude before building the DataFrame
+    weights = final_classifier.coef_[0]
+    abs_weights = np.abs(weights)
+    order = np.argsort(-abs_weights, kind="mergesort")
+
+    coef_df = pd.DataFrame(
+        {
+            "feature": np.asarray(feature_names)[order],
+            "weight": weights[order],
+            "abs": abs_weights[order],
+            "signal": signal,
+            "z_dim": z_dim,
+            "seed": seed,
+            "algorithm": algorithm,
+        }
     )
 
     return coef_df
@@ -239,24 +364,28 @@ def process_y_matrix(
     else:
         y_df = y_mutation
 
-    y_df.loc[y_df > 1] = 1
-    y_df = pd.DataFrame(y_df)
-    y_df.columns = ["status"]
-
-    y_df = (
-        y_df.merge(
-            sample_freeze, how="left", left_index=True, right_on="SAMPLE_BARCODE"
-        )
-        .set_index("SAMPLE_BARCODE")
-        .merge(mutation_burden, left_index=True, right_index=True)
+    y_df = y_df.clip(upper=1).to_frame("status")
+
+    # Align sample info and mutation burden to the y samples by index,
+    # keeping only samples with mutation burden data
+    y_df = y_df.loc[y_df.index.isin(mutation_burden.index)]
+    y_df = pd.concat(
+        [
+            y_df,
+            sample_freeze.set_index("SAMPLE_BARCODE").reindex(y_df.index),
+            mutation_burden.reindex(y_df.index),
+        ],
+        axis="columns",
+        copy=False,
     )
+    y_df.index.name = "SAMPLE_BARCODE"
+    y_df["DISEASE"] = y_df["DISEASE"].astype("category")
 
     # Get statistics per gene and disease
-    disease_counts_df = pd.DataFrame(y_df.groupby("DISEASE").sum()["status"])
-
-    disease_proportion_df = disease_counts_df.divide(
-        y_df["DISEASE"].value_counts(sort=False).sort_index(), axis=0
-    )
+    disease_groups = y_df.groupby("DISEASE", observed=True)
+    disease_counts = disease_groups["status"].sum()
+    disease_counts_df = disease_counts.to_frame("status")
+    disease_proportion_df = (disease_counts / disease_groups.size()).to_frame("status")
 
     # Filter diseases with low counts or proportions for classification balance
     filter_disease_df = (disease_counts_df > filter_count) & (
@@ -264,21 +393,27 @@ def process_y_matrix(
     )
     filter_disease_df.columns = ["disease_included"]
 
-    disease_stats_df = disease_counts_df.merge(
-        disease_proportion_df,
-        left_index=True,
-        right_index=True,
-        suffixes=("_count", "_proportion"),
-    ).merge(filter_disease_df, left_index=True, right_index=True)
+    disease_stats_df = pd.concat(
+        [
+            disease_counts_df.add_suffix("_count"),
+            disease_proportion_df.add_suffix("_proportion"),
+            filter_disease_df,
+        ],
+        axis="columns",
+    )
 
     filter_file = "{}_filtered_cancertypes.tsv".format(gene)
     filter_file = os.path.join(output_directory, filter_file)
     disease_stats_df.to_csv(filter_file, sep="\t")
 
     # Filter
-    use_diseases = disease_stats_df.query("disease_included").index.tolist()
+    use_diseases = disease_stats_df.index[disease_stats_df["disease_included"]]
     burden_filter = y_df["log10_mut"] < hyper_filter * y_df["log10_mut"].std()
-    y_df = y_df.loc[burden_filter, :].query("DISEASE in @use_diseases")
+    y_df = y_df.loc[burden_filter & y_df["DISEASE"].isin(use_diseases), :]
+
+    # drop filtered diseases from the categories, so they don't get
+    # (all-zero) dummy columns downstream
+    y_df = y_df.assign(DISEASE=y_df["DISEASE"].cat.remove_unused_categories())
 
     return y_df
 
@@ -303,9 +438,11 @@ def process_y_matrix_cancertype(
     y_df = y_df.set_index("SAMPLE_BARCODE").merge(
         mutation_burden, left_index=True, right_index=True
     )
+    y_df["DISEASE"] = y_df["DISEASE"].astype("category")
 
     burden_filter = y_df["log10_mut"] < hyper_filter * y_df["log10_mut"].std()
     y_df = y_df.loc[burden_filter, :]
+    y_df = y_df.assign(DISEASE=y_df["DISEASE"].cat.remove_unused_categories())
 
     count_df = pd.DataFrame(y_df.status.value_counts()).reset_index()
     count_df.columns = ["status", acronym]
@@ -326,10 +463,10 @@ def align_matrices(x_file_or_df, y, add_cancertype_covariate=True, algorithm=Non
     The samples used to subset and the processed X and y matrices
     """
     # Load Data
-    try:
-        x_df = pd.read_csv(x_file_or_df, index_col=0, sep='\t')
-    except:
+    if isinstance(x_file_or_df, pd.DataFrame):
         x_df = x_file_or_df
+    else:
+        x_df = _read_z(x_file_or_df)
 
     # Subset samples
     use_samples = set(y.index).intersection(set(x_df.index))
@@ -338,24 +475,41 @@ def align_matrices(x_file_or_df, y, add_cancertype_covariate=True, algorithm=Non
     y = y.reindex(use_samples)
 
     # Transform features to between zero and one
-    x_scaled = StandardScaler().fit_transform(x_df)
-    x_df = pd.DataFrame(x_scaled, columns=x_df.columns, index=x_df.index)
+    # (copy once into a column-major array, since downstream operations work
+    # per feature, then scale that array, in place where sklearn allows)
+    x_scaled = np.array(x_df.to_numpy(dtype=np.float64), order="F", copy=True)
+    x_scaled = StandardScaler(copy=False).fit_transform(x_scaled)
+    x_df = pd.DataFrame(x_scaled, columns=x_df.columns, index=x_df.index, copy=False)
 
     # create covariate info
     mutation_covariate_df = pd.DataFrame(y.loc[:, "log10_mut"], index=y.index)
-
-    # Merge log10 mutation burden covariate
-    x_df = x_df.merge(mutation_covariate_df, left_index=True, right_index=True)
+    x_dfs = [x_df, mutation_covariate_df]
 
     if add_cancertype_covariate:
         # Merge features with covariate data
-        covariate_df = pd.get_dummies(y.DISEASE)
-        x_df = x_df.merge(covariate_df, left_index=True, right_index=True)
+        # (the dummies stay dense: they are only ~30 uint8 columns, kept in
+        # their own block, and the scaled features they're combined with have
+        # no zeros, so a sparse X would be larger and slower to fit on)
+        covariate_df = pd.get_dummies(y.DISEASE, dtype=np.uint8, sparse=False)
+        x_dfs.append(covariate_df)
+
+    # x and y have already been reindexed to the same samples, so the
+    # covariates can be aligned by index rather than joined
+    x_df = pd.concat(x_dfs, axis="columns", copy=False)
 
     return use_samples, x_df, y
 
 
-def train_model(x_train, x_test, y_train, alphas, l1_ratios, n_folds=5, max_iter=1000):
+def train_model(
+    x_train,
+    x_test,
+    y_train,
+    alphas,
+    l1_ratios,
+    n_folds=5,
+    max_iter=1000,
+    search="grid",
+):
     """
     Build the logic and sklearn pipelines to train x matrix based on input y
 
@@ -367,6 +521,9 @@ def train_model(x_train, x_test, y_train, alphas, l1_ratios, n_folds=5, max_iter
     l1_ratios - list of l1 mixing parameters to perform cross validation over
     n_folds - int of how many folds of cross validation to perform
     max_iter - the maximum number of iterations to test until convergence
+    search - how to search the hyperparameter grid, either "grid" (fit every
+             candidate on all samples) or "halving" (successive halving
+             over training samples; requires scikit-learn >= 0.24)
 
     Output:
     The full pipeline sklearn object and y matrix predictions for training, testing,
@@ -395,30 +552,64 @@ def train_model(x_train, x_test, y_train, alphas, l1_ratios, n_folds=5, max_iter
         ]
     )
 
-    cv_pipeline = GridSearchCV(
-        estimator=estimator,
-        param_grid=clf_parameters,
-        n_jobs=-1,
-        cv=n_folds,
-        scoring="roc_auc",
-        return_train_score=True,
-    )
-
-    # Fit the model
-    cv_pipeline.fit(X=x_train, y=y_train.status)
-
-    # Obtain cross validation results
-    y_cv = cross_val_predict(
-        cv_pipeline.best_estimator_,
-        X=x_train,
-        y=y_train.status,
-        cv=n_folds,
-        method="decision_function",
-    )
+    if search == "halving":
+        # fit all candidates on a subsample of the training data, then give
+        # more samples only to the best-performing candidates (SGD stops early
+        # at tol, so limiting iterations instead wouldn't save any work)
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        cv_pipeline = HalvingGridSearchCV(
+            estimator=estimator,
+            param_grid=clf_parameters,
+            factor=3,
+            resource="n_samples",
+            random_state=0,
+            n_jobs=-1,
+            cv=n_folds,
+            scoring="roc_auc",
+            return_train_score=True,
+        )
+    elif search == "grid":
+        cv_pipeline = GridSearchCV(
+            estimator=estimator,
+            param_grid=clf_parameters,
+            n_jobs=-1,
+            cv=n_folds,
+            scoring="roc_auc",
+            return_train_score=True,
+        )
+    else:
+        raise ValueError("search must be one of 'grid' or 'halving'")
+
+    # Convert features to C-contiguous float64 arrays once up front, which is
+    # what SGDClassifier works on internally, so sklearn doesn't copy the
+    # DataFrames again for every fold and candidate
+    x_train_arr = np.ascontiguousarray(x_train.to_numpy(dtype=np.float64))
+    x_test_arr = np.ascontiguousarray(x_test.to_numpy(dtype=np.float64))
+    y_train_arr = y_train.status.to_numpy()
+
+    # Fit the model and obtain cross validation results
+    # (the data fits in memory on a single node, so use local joblib
+    # processes rather than a dask scheduler)
+    with parallel_backend("loky", n_jobs=-1):
+        cv_pipeline.fit(X=x_train_arr, y=y_train_arr)
+
+        # Obtain cross validation results
+        # (the search doesn't keep its per-fold models, so the best parameters
+        # are refit on each fold here, in parallel across folds)
+        y_cv = cross_val_predict(
+            cv_pipeline.best_estimator_,
+            X=x_train_arr,
+            y=y_train_arr,
+            cv=n_folds,
+            method="decision_function",
+            n_jobs=-1,
+        )
 
     # Get all performance results
-    y_predict_train = cv_pipeline.decision_function(x_train)
-    y_predict_test = cv_pipeline.decision_function(x_test)
+    y_predict_train = cv_pipeline.decision_function(x_train_arr)
+    y_predict_test = cv_pipeline.decision_function(x_test_arr)
 
     return cv_pipeline, y_predict_train, y_predict_test, y_cv
 
@@ -439,7 +630,61 @@ def check_status(file):
     return os.path.isfile(file)
 
 
-def build_good_feature_matrix(coef_df):
+@lru_cache(maxsize=None)
+def _load_z(z_dim, seed, algorithm, shuffled, models_dir):
+    """
+    Load (and memoize) the testing and training z matrices for a single model
+    """
+    comp_dir = os.path.join(
+        models_dir, "ensemble_z_matrices", "components_{}".format(z_dim)
+    )
+    prefix = "{}_{}{}".format(algorithm, seed, "_shuffled" if shuffled else "")
+
+    test_df = _read_z(os.path.join(comp_dir, "{}_z_test_matrix.tsv.gz".format(prefix)))
+    train_df = _read_z(os.path.join(comp_dir, "{}_z_matrix.tsv.gz".format(prefix)))
+
+    return test_df, train_df
+
+
+def get_feature(
+    z_dim, seed, feature=None, algorithm=None, shuffled=False, models_dir=cfg.models_dir
+):
+    """
+    Retrieve testing and training z matrices (or a single feature from them)
+    for the given compression model
+
+    Each model's matrices are only read from disk once; repeated calls select
+    from the cached matrices.
+
+    Arguments:
+    z_dim - the internal bottleneck dimension of the compression model
+    seed - the seed used to compress the data
+    feature - name of a single feature to retrieve (e.g. "pca_3"), or None to
+              retrieve all features
+    algorithm - the algorithm used to compress the data (if None, inferred from
+                the feature name)
+    shuffled - boolean if the model was trained on shuffled data
+    models_dir - directory to look in for compressed features
+
+    Output:
+    tuple of testing and training DataFrames
+    """
+    if algorithm is None:
+        if feature is None:
+            raise ValueError("one of feature or algorithm must be specified")
+        algorithm = feature.split("_")[0]
+
+    test_df, train_df = _load_z(
+        str(z_dim), str(seed), algorithm, shuffled, str(models_dir)
+    )
+
+    # return new frames so callers can modify them without touching the cache
+    if feature is not None:
+        return test_df[[feature]], train_df[[feature]]
+    return test_df.copy(), train_df.copy()
+
+
+def build_good_feature_matrix(coef_df, models_dir=cfg.models_dir):
     """
     Compile training and testing feature matrices (X) given a coefficient DataFrame
     output from the various mutation classification analyses through repeated calls to
@@ -448,49 +693,60 @@ def build_good_feature_matrix(coef_df):
     Arguments:
     coef_df - an input dataframe with the following information:
         z_dim, seed, and feature columns
+    models_dir - directory to look in for compressed features
 
     Output:
     Reads a series of compressed z matrices for training and testing and combines them
     into two dataframes. The dataframes represent the training and testing matrices
     used in downstream analyses.
     """
-    all_test_features = []
-    all_train_features = []
-    for feature_idx, feature_row in coef_df.iterrows():
+    all_test_features = [None] * coef_df.shape[0]
+    all_train_features = [None] * coef_df.shape[0]
+    for feature_idx, (_, feature_row) in enumerate(coef_df.iterrows()):
         z_dim = feature_row.z_dim
         seed = feature_row.seed
         feature = feature_row.feature
 
-        test_feature_df, train_feature_df = get_feature(z_dim, seed, feature=feature)
-        all_test_features.append(test_feature_df)
-        all_train_features.append(train_feature_df)
+        test_feature_df, train_feature_df = get_feature(
+            z_dim, seed, feature=feature, models_dir=models_dir
+        )
+        all_test_features[feature_idx] = test_feature_df
+        all_train_features[feature_idx] = train_feature_df
 
-    all_test_features_df = pd.concat(all_test_features, axis="columns")
-    all_train_features_df = pd.concat(all_train_features, axis="columns")
+    all_test_features_df = pd.concat(all_test_features, axis="columns", copy=False)
+    all_train_features_df = pd.concat(
+        all_train_features, axis="columns", copy=False
+    )
 
     return all_test_features_df, all_train_features_df
 
 
-def load_ensemble_dict(zs, seeds, algorithm=None, use_all_features=False):
+def load_ensemble_dict(
+    zs, seeds, algorithm=None, use_all_features=False, models_dir=cfg.models_dir
+):
     """
     Return algorithm dictionary storing ensemble matrices for single algorithms
     """
     algorithm_dict = {}
     ensemble_algorithm_dict = {}
+    n_frames = len(zs) * len(seeds)
     for signal in ["signal", "shuffled"]:
-        all_ensemble_test = []
-        all_ensemble_train = []
         if signal == "signal":
             shuffled = False
         else:
             shuffled = True
         algorithm_dict[signal] = {}
         ensemble_algorithm_dict[signal] = {}
-        for z in zs:
-            algorithm_dict[signal][str(z)] = {}
 
-            ensemble_test = []
-            ensemble_train = []
+        # collect frames across all (z, seed) pairs and concatenate once per
+        # signal, rather than once per z
+        ensemble_test = [None] * n_frames
+        ensemble_train = [None] * n_frames
+        z_slices = {}
+        frame_idx = 0
+        col_idx = 0
+        for z in zs:
+            z_start = col_idx
             for seed in seeds:
 
                 # Inform status
@@ -502,7 +758,11 @@ def load_ensemble_dict(zs, seeds, algorithm=None, use_all_features=False):
 
                 # Load the specific z matrix (training and testing) and pull out feature
                 test_feature_df, train_feature_df = get_feature(
-                    z_dim=z, seed=seed, algorithm=algorithm, shuffled=shuffled
+                    z_dim=z,
+                    seed=seed,
+                    algorithm=algorithm,
+                    shuffled=shuffled,
+                    models_dir=models_dir,
                 )
 
                 test_feature_df.columns = test_feature_df.columns + "_{}_{}_{}".format(
@@ -512,30 +772,25 @@ def load_ensemble_dict(zs, seeds, algorithm=None, use_all_features=False):
                     train_feature_df.columns + "_{}_{}_{}".format(seed, z, signal)
                 )
 
-                # Append to growing list
-                if not use_all_features:
-                    ensemble_test.append(test_feature_df)
-                    ensemble_train.append(train_feature_df)
-                else:
-                    all_ensemble_test.append(test_feature_df)
-                    all_ensemble_train.append(train_feature_df)
-
-            # Load matrices into dictionary
-            if not use_all_features:
-                algorithm_dict[signal][str(z)]["test"] = pd.concat(
-                    ensemble_test, axis="columns"
-                )
-                algorithm_dict[signal][str(z)]["train"] = pd.concat(
-                    ensemble_train, axis="columns"
-                )
+                ensemble_test[frame_idx] = test_feature_df
+                ensemble_train[frame_idx] = train_feature_df
+                frame_idx += 1
+                col_idx += test_feature_df.shape[1]
+            z_slices[str(z)] = slice(z_start, col_idx)
+
+        ensemble_test_df = pd.concat(ensemble_test, axis="columns", copy=False)
+        ensemble_train_df = pd.concat(ensemble_train, axis="columns", copy=False)
 
         if use_all_features:
-            ensemble_algorithm_dict[signal]["test"] = pd.concat(
-                all_ensemble_test, axis="columns"
-            )
-            ensemble_algorithm_dict[signal]["train"] = pd.concat(
-                all_ensemble_train, axis="columns"
-            )
+            ensemble_algorithm_dict[signal]["test"] = ensemble_test_df
+            ensemble_algorithm_dict[signal]["train"] = ensemble_train_df
+        else:
+            # Load matrices for each z into dictionary
+            for z, z_slice in z_slices.items():
+                algorithm_dict[signal][z] = {
+                    "test": ensemble_test_df.iloc[:, z_slice],
+                    "train": ensemble_train_df.iloc[:, z_slice],
+                }
 
     if use_all_features:
         return ensemble_algorithm_dict
@@ -57,3 +57,49 @@ def test_lr(classify_data, saved_results):
                        np.sort(saved_coefs['weight'].values),
                        atol=1e-4)
 
+
+
+def test_lr_halving(classify_data):
+    """Check successive halving search runs and selects from the grid."""
+    pytest.importorskip('sklearn.experimental.enable_halving_search_cv')
+    from tcga_util import train_model
+
+    X_train_df, X_test_df, y_train_df, y_test_df = classify_data
+
+    cv_pipeline, y_pred_train, y_pred_test, y_cv = train_model(
+        x_train=X_train_df,
+        x_test=X_test_df,
+        y_train=y_train_df,
+        alphas=cfg.alphas,
+        l1_ratios=cfg.l1_ratios,
+        n_folds=cfg.folds,
+        max_iter=cfg.max_iter,
+        search='halving'
+    )
+
+    assert y_pred_train.shape == (X_train_df.shape[0],)
+    assert y_pred_test.shape == (X_test_df.shape[0],)
+    assert y_cv.shape == (X_train_df.shape[0],)
+    assert cv_pipeline.best_params_['classify__alpha'] in cfg.alphas
+    assert cv_pipeline.best_params_['classify__l1_ratio'] in cfg.l1_ratios
+
+    # later rounds should fit fewer candidates on more samples
+    n_resources = np.unique(cv_pipeline.cv_results_['n_resources'])
+    assert len(n_resources) > 1
+    assert n_resources.max() <= X_train_df.shape[0]
+
+
+def test_lr_bad_search(classify_data):
+    from tcga_util import train_model
+
+    X_train_df, X_test_df, y_train_df, y_test_df = classify_data
+
+    with pytest.raises(ValueError):
+        train_model(
+            x_train=X_train_df,
+            x_test=X_test_df,
+            y_train=y_train_df,
+            alphas=cfg.alphas,
+            l1_ratios=cfg.l1_ratios,
+            search='random'
+        )
@@ -0,0 +1,88 @@
+"""
+Tests for AUROC/AUPR computation in tcga_util
+
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score, average_precision_score
+
+import sys; sys.path.append('.')
+import config as cfg
+from tcga_util import get_threshold_metrics
+
+
+@pytest.mark.parametrize('n_samples', [10, 100, 1000])
+@pytest.mark.parametrize('score_type', ['float', 'tied', 'int', 'uint', 'bool'])
+def test_metrics_match_sklearn(n_samples, score_type):
+    """Compare single-pass AUROC/AUPR to sklearn implementations."""
+    np.random.seed(cfg.default_seed)
+    y_true = np.random.randint(2, size=n_samples)
+    y_true[:2] = [0, 1]
+    y_pred = np.random.normal(size=n_samples)
+    if score_type == 'tied':
+        # round predictions so many samples share the same score
+        y_pred = np.round(y_pred, 1)
+    elif score_type == 'int':
+        y_pred = np.round(y_pred * 3).astype(int)
+    elif score_type == 'uint':
+        y_pred = np.random.randint(4, size=n_samples).astype(np.uint8)
+    elif score_type == 'bool':
+        y_pred = y_pred > 0
+
+    results = get_threshold_metrics(y_true, y_pred)
+
+    assert np.isclose(results['auroc'], roc_auc_score(y_true, y_pred))
+    assert np.isclose(results['aupr'], average_precision_score(y_true, y_pred))
+
+
+def test_metrics_uint_scores():
+    """Unsigned int scores shouldn't wrap around when sorted."""
+    y_true = np.array([0, 0, 1, 1, 1, 0, 1])
+    y_pred = np.array([0, 1, 2, 3, 3, 0, 2], dtype=np.uint8)
+
+    results = get_threshold_metrics(y_true, y_pred, metrics_only=True)
+    assert np.isclose(results['auroc'], 1.0)
+    assert np.isclose(results['aupr'], 1.0)
+
+
+def test_metrics_only():
+    np.random.seed(cfg.default_seed)
+    y_true = np.random.randint(2, size=50)
+    y_pred = np.random.normal(size=50)
+
+    results = get_threshold_metrics(y_true, y_pred, metrics_only=True)
+    assert set(results.keys()) == {'auroc', 'aupr'}
+
+
+@pytest.mark.parametrize('label', [0, 1])
+def test_metrics_single_class(label):
+    """AUROC/AUPR are undefined if only one class is present."""
+    y_true = np.full(10, label)
+    y_pred = np.random.normal(size=10)
+    with pytest.raises(ValueError):
+        get_threshold_metrics(y_true, y_pred, metrics_only=True)
+
+
+def test_pr_curve_subsampling():
+    """Check PR curves are subsampled only if intermediate points are dropped."""
+    np.random.seed(cfg.default_seed)
+    n_samples = 2000
+    y_true = np.random.randint(2, size=n_samples)
+    y_pred = np.random.normal(size=n_samples) + y_true
+
+    full_results = get_threshold_metrics(y_true, y_pred, drop=False)
+    full_pr_df = full_results['pr_df']
+    assert full_pr_df.shape[0] == n_samples + 1
+
+    for max_pr_points in [10, 500]:
+        results = get_threshold_metrics(y_true, y_pred,
+                                        max_pr_points=max_pr_points)
+        pr_df = results['pr_df']
+        assert pr_df.shape[0] <= max_pr_points
+        # both ends of the curve are kept
+        pd.testing.assert_series_equal(pr_df.iloc[0], full_pr_df.iloc[0])
+        pd.testing.assert_series_equal(pr_df.iloc[-1], full_pr_df.iloc[-1],
+                                       check_names=False)
+        assert results['auroc'] == full_results['auroc']
+        assert results['aupr'] == full_results['aupr']
@@ -0,0 +1,166 @@
+"""
+Tests for z matrix loading utilities in tcga_util
+
+"""
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys; sys.path.append('.')
+import tcga_util
+from tcga_util import (
+    _read_z,
+    get_feature,
+    build_good_feature_matrix,
+    load_ensemble_dict,
+)
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    """Write small z matrices in the layout of 1.compress_given_z.py."""
+    np.random.seed(0)
+    for z_dim in [2, 3]:
+        comp_dir = tmp_path / 'ensemble_z_matrices' / 'components_{}'.format(z_dim)
+        comp_dir.mkdir(parents=True)
+        for seed in [1, 2]:
+            for alg in ['pca', 'ica']:
+                for shuffled in ['', '_shuffled']:
+                    columns = ['{}_{}'.format(alg, i) for i in range(z_dim)]
+                    for suffix, n_samples in [('z_matrix', 4),
+                                              ('z_test_matrix', 3)]:
+                        z_file = comp_dir / '{}_{}{}_{}.tsv.gz'.format(
+                            alg, seed, shuffled, suffix)
+                        pd.DataFrame(
+                            np.random.uniform(size=(n_samples, z_dim)),
+                            index=['S{}'.format(i) for i in range(n_samples)],
+                            columns=columns
+                        ).to_csv(str(z_file), sep='\t', compression='gzip')
+    return str(tmp_path)
+
+
+def test_read_z_cache(tmp_path):
+    """Cached pickle is used until the z matrix is rewritten."""
+    z_file = str(tmp_path / 'pca_1_z_matrix.tsv.gz')
+    pd.DataFrame(np.ones((3, 2))).to_csv(z_file, sep='\t', compression='gzip')
+
+    assert np.all(_read_z(z_file).values == 1)
+    assert os.path.exists(z_file + '.pkl')
+    assert np.all(_read_z(z_file).values == 1)
+
+    # rewrite the z matrix and make sure it's newer than the cache
+    pd.DataFrame(np.zeros((3, 2))).to_csv(z_file, sep='\t', compression='gzip')
+    cache_mtime = os.path.getmtime(z_file + '.pkl')
+    os.utime(z_file, (cache_mtime + 1, cache_mtime + 1))
+
+    assert np.all(_read_z(z_file).values == 0)
+    # no temporary files left behind
+    assert sorted(os.listdir(str(tmp_path))) == [
+        'pca_1_z_matrix.tsv.gz', 'pca_1_z_matrix.tsv.gz.pkl']
+
+
+def test_get_feature(models_dir):
+    test_df, train_df = get_feature(3, 1, feature='ica_2', models_dir=models_dir)
+    assert list(test_df.columns) == ['ica_2']
+    assert test_df.shape == (3, 1)
+    assert train_df.shape == (4, 1)
+
+    test_df, train_df = get_feature(3, 1, algorithm='pca', shuffled=True,
+                                    models_dir=models_dir)
+    assert list(train_df.columns) == ['pca_0', 'pca_1', 'pca_2']
+
+    with pytest.raises(ValueError):
+        get_feature(3, 1, models_dir=models_dir)
+
+
+def test_build_good_feature_matrix(models_dir):
+    coef_df = pd.DataFrame({'z_dim': [2, 3, 2],
+                            'seed': [1, 2, 2],
+                            'feature': ['pca_1', 'ica_2', 'pca_0']})
+    test_df, train_df = build_good_feature_matrix(coef_df, models_dir=models_dir)
+
+    assert list(test_df.columns) == ['pca_1', 'ica_2', 'pca_0']
+    assert test_df.shape == (3, 3)
+    assert train_df.shape == (4, 3)
+
+    _, expected_train_df = get_feature(3, 2, algorithm='ica',
+                                       models_dir=models_dir)
+    assert np.allclose(train_df.iloc[:, 1], expected_train_df['ica_2'])
+
+
+def test_load_ensemble_dict(models_dir):
+    ensemble_dict = load_ensemble_dict([2, 3], [1, 2], algorithm='pca',
+                                       models_dir=models_dir)
+
+    for signal in ['signal', 'shuffled']:
+        for z_dim in [2, 3]:
+            z_dict = ensemble_dict[signal][str(z_dim)]
+            expected_cols = ['pca_{}_{}_{}_{}'.format(i, seed, z_dim, signal)
+                             for seed in [1, 2] for i in range(z_dim)]
+            assert list(z_dict['test'].columns) == expected_cols
+            assert list(z_dict['train'].columns) == expected_cols
+            assert z_dict['test'].shape == (3, 2 * z_dim)
+            assert z_dict['train'].shape == (4, 2 * z_dim)
+
+        # the per-z slices should hold the same values as the z matrices
+        _, train_df = get_feature(3, 2, algorithm='pca',
+                                  shuffled=(signal == 'shuffled'),
+                                  models_dir=models_dir)
+        assert np.allclose(ensemble_dict[signal]['3']['train'].iloc[:, 3:],
+                           train_df.values)
+
+    # renaming columns in the ensemble shouldn't touch the cached matrices
+    test_df, train_df = get_feature(2, 1, algorithm='pca', models_dir=models_dir)
+    assert list(test_df.columns) == ['pca_0', 'pca_1']
+    assert list(train_df.columns) == ['pca_0', 'pca_1']
+
+    all_dict = load_ensemble_dict([2, 3], [1, 2], algorithm='pca',
+                                  use_all_features=True, models_dir=models_dir)
+    assert all_dict['signal']['test'].shape == (3, 10)
+    assert all_dict['shuffled']['train'].shape == (4, 10)
+
+    with pytest.raises(ValueError):
+        load_ensemble_dict([2], [1], models_dir=models_dir)
+
+
+def test_read_z_cache_permissions(tmp_path):
+    """Cached pickle gets the usual permissions for a new file."""
+    z_file = str(tmp_path / 'pca_1_z_matrix.tsv.gz')
+    pd.DataFrame(np.ones((3, 2))).to_csv(z_file, sep='\t', compression='gzip')
+    _read_z(z_file)
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert (os.stat(z_file + '.pkl').st_mode & 0o777) == (0o666 & ~umask)
+
+
+def test_read_z_unwritable_dir(tmp_path, monkeypatch):
+    """z matrices can still be read if the cache can't be written."""
+    z_file = str(tmp_path / 'pca_1_z_matrix.tsv.gz')
+    pd.DataFrame(np.ones((3, 2))).to_csv(z_file, sep='\t', compression='gzip')
+
+    os.chmod(str(tmp_path), 0o555)
+    try:
+        if os.access(str(tmp_path), os.W_OK):
+            # permissions aren't enforced (e.g. running as root), so fail
+            # the temp file creation the way a read-only directory would
+            def mkstemp(*args, **kwargs):
+                raise PermissionError('read-only directory')
+            monkeypatch.setattr(tcga_util.tempfile, 'mkstemp', mkstemp)
+        assert np.all(_read_z(z_file).values == 1)
+        assert os.listdir(str(tmp_path)) == ['pca_1_z_matrix.tsv.gz']
+    finally:
+        os.chmod(str(tmp_path), 0o755)
+
+
+def test_read_z_bad_cache(tmp_path):
+    """z matrices are reread if the cached pickle can't be loaded."""
+    z_file = str(tmp_path / 'pca_1_z_matrix.tsv.gz')
+    pd.DataFrame(np.ones((3, 2))).to_csv(z_file, sep='\t', compression='gzip')
+    with open(z_file + '.pkl', 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert np.all(_read_z(z_file).values == 1)
+    # and the bad cache is replaced
+    assert np.all(pd.read_pickle(z_file + '.pkl').values == 1)
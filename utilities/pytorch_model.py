@@ -524,8 +524,10 @@ if __name__ == '__main__':
                if y_pred_bn_test[i] == y_test[i]]
     ) / len(y_pred_test)
 
-    sk_train_results = get_threshold_metrics(y_train, y_pred_train)
-    sk_test_results = get_threshold_metrics(y_test, y_pred_test)
+    sk_train_results = get_threshold_metrics(y_train, y_pred_train,
+                                             metrics_only=True)
+    sk_test_results = get_threshold_metrics(y_test, y_pred_test,
+                                            metrics_only=True)
 
     losses, preds, preds_bn = model.train_torch_model(X_train, X_test,
                                                       y_train, y_test,
@@ -537,8 +539,10 @@ if __name__ == '__main__':
     torch_train_acc = TorchLR.calculate_accuracy(y_train, y_pred_bn_train.flatten())
     torch_test_acc = TorchLR.calculate_accuracy(y_test, y_pred_bn_test.flatten())
 
-    torch_train_results = get_threshold_metrics(y_train, y_pred_train)
-    torch_test_results = get_threshold_metrics(y_test, y_pred_test)
+    torch_train_results = get_threshold_metrics(y_train, y_pred_train,
+                                                metrics_only=True)
+    torch_test_results = get_threshold_metrics(y_test, y_pred_test,
+                                               metrics_only=True)
 
     print('Sklearn train accuracy: {:.3f}, test accuracy: {:.3f}'.format(
         sk_train_acc, sk_test_acc))
@@ -562,8 +566,10 @@ if __name__ == '__main__':
     random_train_acc = TorchLR.calculate_accuracy(y_train, y_pred_bn_train)
     random_test_acc = TorchLR.calculate_accuracy(y_test, y_pred_bn_test)
 
-    random_train_results = get_threshold_metrics(y_train, y_pred_train)
-    random_test_results = get_threshold_metrics(y_test, y_pred_test)
+    random_train_results = get_threshold_metrics(y_train, y_pred_train,
+                                                 metrics_only=True)
+    random_test_results = get_threshold_metrics(y_test, y_pred_test,
+                                                metrics_only=True)
 
     print('Random guessing train accuracy: {:.3f}, test accuracy: {:.3f}'.format(
         random_train_acc, random_test_acc))